@@ -1,13 +1,38 @@
+from gevent import monkey
+monkey.patch_all()
+
 import os
 import time
+import logging
+import threading
+import functools
 from flask import Flask, render_template, request, jsonify, send_from_directory
 from flask_socketio import SocketIO, emit
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
 import numpy as np
+import orjson
 from collections import deque, Counter
+import gevent
+from gevent.event import AsyncResult
+from gevent.queue import Queue, Empty
+from gevent.threadpool import ThreadPool
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # --- CONFIGURATION ---
 N_FRAMES = 30
 MIN_CONFIDENCE = 0.65
+MIN_PREDICTION_INTERVAL = 0.3  # seconds between predictions per client
+MAX_HISTORY = 20
+MAX_BATCH = 8  # sequences coalesced into one interpreter call
+MAX_BATCH_WAIT = 0.008  # seconds to wait for a batch to fill up
+INFERENCE_THREADS = 2  # TFLite intra-op threads
+TFLITE_DELEGATE = os.environ.get("TFLITE_DELEGATE")  # optional delegate .so path
+STATIC_MAX_AGE = 86400  # one day
+ANIMATION_MAX_AGE = 31536000  # one year
+SEQUENCE_NBYTES = N_FRAMES * 144 * 4  # raw little-endian float32 payload
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # --- FILE PATHS ---
@@ -15,66 +40,253 @@ MODEL_PATH = os.path.join(ROOT_DIR, "models", "realtime.tflite")
 CLASS_NAMES_PATH = os.path.join(ROOT_DIR, "models", "label_encoder.npy")
 GLOSS_MAP_PATH = os.path.join(ROOT_DIR, "gloss_map.json")
 OUTPUT_DIR = os.path.join(ROOT_DIR, "static", "animations")
+OUTPUT_URL_PREFIX = '/' + os.path.relpath(OUTPUT_DIR, ROOT_DIR).replace(os.sep, '/')
+
+# --- JSON ---
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson instead of the stdlib json module"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+class ORJSONModule:
+    """json-module shim for SocketIO, which passes stdlib-only kwargs like separators"""
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
 
 # --- FLASK SETUP ---
-app = Flask(__name__)
+# Static files are served by serve_static below so they get cache headers
+app = Flask(__name__, static_folder=None)
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-socketio = SocketIO(app, async_mode='threading', cors_allowed_origins="*")
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 500
+Compress(app)
+socketio = SocketIO(app, async_mode='gevent', cors_allowed_origins="*", json=ORJSONModule,
+                    http_compression=True, compression_threshold=500)
+
+# TFLite invoke() is a blocking C call, so inference runs on a real OS thread
+# to keep the gevent event loop free to service other sockets. A single worker
+# because the recognizer shares one interpreter, which is not thread-safe.
+inference_pool = ThreadPool(1)
+# Video rendering is CPU-bound OpenCV work, so it gets its own small pool
+animation_pool = ThreadPool(2)
 
 # --- GLOBAL VARIABLES ---
 recognizer = None
 generator = None
 user_sessions = {}
+animation_tasks = {}  # sid -> in-flight animation task, killed on disconnect
+ANIM_CACHE = {}  # text -> video_url, oldest entries evicted first
+ANIM_CACHE_SIZE = 1024
 
 # --- INITIALIZE MODELS ---
 def initialize_models():
     global recognizer, generator
     try:
-        print("Initializing ISL Recognizer...")
+        logger.info("Initializing ISL Recognizer...")
         from isl_recognizer import ISLRecognizer
-        recognizer = ISLRecognizer(MODEL_PATH, CLASS_NAMES_PATH)
-        print("ISL Recognizer initialized")
+        recognizer = ISLRecognizer(MODEL_PATH, CLASS_NAMES_PATH, num_threads=INFERENCE_THREADS,
+                                   delegate_path=TFLITE_DELEGATE, max_batch=MAX_BATCH)
+        logger.info("ISL Recognizer initialized")
+        
+        # Warm up the interpreter so the first client doesn't pay the cold-start cost.
+        # Unsmoothed on purpose: the dummy label must not enter the smoothing buffer.
+        try:
+            start = time.perf_counter()
+            recognizer.predict_sequence(np.zeros((N_FRAMES, 144), dtype=np.float32))
+            logger.info("ISL Recognizer warmed up in %.1f ms", (time.perf_counter() - start) * 1000)
+        except Exception as e:
+            logger.warning("Warm-up inference failed: %s", e)
         
         # Initialize animation generator if available
         try:
             from isl_generator import ISLGenerator
-            generator = ISLGenerator(GLOSS_MAP_PATH, OUTPUT_DIR)
-            print("ISL Generator initialized")
+            # Threads are greenlets after monkey-patching, so per-frame drawing
+            # threads would not run in parallel here; animation_pool covers that
+            generator = ISLGenerator(GLOSS_MAP_PATH, OUTPUT_DIR, render_threads=1)
+            logger.info("ISL Generator initialized")
             os.makedirs(OUTPUT_DIR, exist_ok=True)
         except ImportError:
-            print("ISL Generator not available - animation features disabled")
+            logger.warning("ISL Generator not available - animation features disabled")
         except Exception as e:
-            print(f"Error initializing generator: {e}")
+            logger.error("Error initializing generator: %s", e)
             
     except Exception as e:
-        print(f"Error initializing models: {e}")
+        logger.error("Error initializing models: %s", e)
 
 initialize_models()
 
+# --- BATCHED INFERENCE ---
+_scratch = threading.local()
+
+def _scratch_buffer():
+    """Per-thread (MAX_BATCH, N_FRAMES, 144) buffer reused across batches"""
+    buffer = getattr(_scratch, 'buffer', None)
+    if buffer is None:
+        buffer = _scratch.buffer = np.empty((MAX_BATCH, N_FRAMES, 144), dtype=np.float32)
+    return buffer
+
+def _validate_shape(sequence):
+    """Raise ValueError unless `sequence` is (N_FRAMES, 144), without converting it"""
+    if isinstance(sequence, np.ndarray):
+        if sequence.shape != (N_FRAMES, 144):
+            raise ValueError(f'Invalid sequence shape: {sequence.shape}')
+        return
+    try:
+        valid = len(sequence) == N_FRAMES and all(len(row) == 144 for row in sequence)
+    except TypeError:
+        valid = False
+    if not valid:
+        raise ValueError(f'Invalid sequence shape: expected ({N_FRAMES}, 144)')
+
+def _run_inference_batch(sequences):
+    """Runs on the inference pool: fills the scratch buffer in place and runs one batched prediction"""
+    buffer = _scratch_buffer()
+    filled, results = 0, []
+    for sequence in sequences:
+        try:
+            _validate_shape(sequence)
+            buffer[filled] = sequence
+        except (ValueError, TypeError) as e:
+            results.append(ValueError(str(e)))
+            continue
+        filled += 1
+        results.append(None)
+    
+    # Use smoothed prediction like OpenCV code
+    predictions = iter(recognizer.predict_batch_smoothed(list(buffer[:filled])) if filled else [])
+    return [result if result is not None else next(predictions) for result in results]
+
+class BatchedRecognizer:
+    """Coalesces predictions from concurrent clients into a single batched invoke()"""
+    def __init__(self, max_batch=MAX_BATCH, max_wait=MAX_BATCH_WAIT):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = Queue()
+        gevent.spawn(self._worker)
+
+    def predict(self, sequence):
+        """Block the calling greenlet until the batch containing `sequence` has run"""
+        result = AsyncResult()
+        self.queue.put((sequence, result))
+        return result.get()
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        # A lone request goes straight out; only wait for stragglers when
+        # other clients are already queued
+        if self.queue.empty():
+            return batch
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                outcomes = inference_pool.apply(_run_inference_batch, ([seq for seq, _ in batch],))
+            except Exception as e:
+                outcomes = [e] * len(batch)
+            for (_, result), outcome in zip(batch, outcomes):
+                if isinstance(outcome, Exception):
+                    result.set_exception(outcome)
+                else:
+                    result.set(outcome)
+
+batched_recognizer = BatchedRecognizer()
+
 # --- UTILITY FUNCTIONS ---
-def isl_to_english_sentence(history_of_signs):
-    return " ".join(history_of_signs) if history_of_signs else ""
+# The history is fingerspelled letters, so the sentence is just the letters
+# joined; utils.isl_to_english_sentence's word grammar does not apply here.
+@functools.lru_cache(maxsize=4096)
+def _cached_sentence(history_tuple):
+    """Memoized sentence builder; the sentence is a pure function of the history"""
+    return " ".join(history_tuple)
+
+def _generate_animation_url(text):
+    """Return the URL of the animation for `text`, reusing a previous render when possible"""
+    cached = ANIM_CACHE.get(text)
+    if cached and os.path.exists(os.path.join(OUTPUT_DIR, os.path.basename(cached))):
+        return cached
+    
+    # The generator only returns a path once the video has been written
+    video_path = animation_pool.apply(generator.generate_video_from_text, (text,))
+    if not video_path:
+        return None
+    
+    video_url = f"{OUTPUT_URL_PREFIX}/{os.path.basename(video_path)}"
+    if len(ANIM_CACHE) >= ANIM_CACHE_SIZE:
+        ANIM_CACHE.pop(next(iter(ANIM_CACHE)))
+    ANIM_CACHE[text] = video_url
+    return video_url
+
+def _update_history(history, label, confidence):
+    """Append a confident, non-repeated sign to `history`; return True if it changed"""
+    if confidence > MIN_CONFIDENCE and (not history or history[-1] != label):
+        history.append(label)
+        return True
+    return False
+
+def _prediction_payload(label, confidence, sentence, history):
+    """The one response schema shared by every prediction endpoint"""
+    return {
+        "label": label,
+        "confidence": float(confidence),
+        "sentence": sentence,
+        "history": history
+    }
+
+def _prediction_response(label, confidence, sentence, history):
+    """HTTP prediction response, serialized by orjson straight to bytes"""
+    body = orjson.dumps(_prediction_payload(label, confidence, sentence, history))
+    return app.response_class(body, mimetype="application/json")
 
 # --- ROUTES ---
 @app.route("/")
 def index():
     return render_template("index.html")
 
+def _send_cached(directory, filename, max_age, immutable=False):
+    """send_from_directory with conditional GETs and browser caching"""
+    response = send_from_directory(directory, filename, conditional=True, max_age=max_age)
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
 @app.route('/js/<path:filename>')
 def serve_js(filename):
-    return send_from_directory('js', filename)
+    return _send_cached('js', filename, STATIC_MAX_AGE)
 
 @app.route('/css/<path:filename>')
 def serve_css(filename):
-    return send_from_directory('css', filename)
+    return _send_cached('css', filename, STATIC_MAX_AGE)
 
-@app.route('/static/<path:filename>')
+@app.route('/static/<path:filename>', endpoint='static')
 def serve_static(filename):
-    return send_from_directory('static', filename)
+    # Generated animations have unique names, so they never change once written
+    if filename.startswith('animations/'):
+        return _send_cached('static', filename, ANIMATION_MAX_AGE, immutable=True)
+    return _send_cached('static', filename, STATIC_MAX_AGE)
 
 @app.route('/animations/<path:filename>')
 def serve_animations(filename):
-    return send_from_directory(OUTPUT_DIR, filename)
+    return _send_cached(OUTPUT_DIR, filename, ANIMATION_MAX_AGE, immutable=True)
 
 @app.route("/.well-known/appspecific/com.chrome.devtools.json")
 def chrome_devtools():
@@ -88,34 +300,50 @@ def http_predict_sequence():
     
     try:
         data = request.get_json()
-        
-        # --- NEW: Catch conversion errors specifically ---
+        sequence = data.get("sequence", [])
+
+        # Reject bad shapes from the list lengths, before any numpy allocation
         try:
-            sequence = np.array(data.get("sequence", []), dtype=np.float32)
-        except ValueError:
-            return jsonify({"error": "Invalid data format: Sequence must be numbers"}), 400
-        # -------------------------------------------------
+            _validate_shape(sequence)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
         history_of_signs = data.get("history", [])
 
-        if sequence.shape != (N_FRAMES, 144):
-            return jsonify({"error": f"Invalid sequence shape: {sequence.shape}"}), 400
-
-        # Use smoothed prediction like OpenCV code
-        smoothed_label, confidence = recognizer.predict_sequence_smoothed(sequence)
+        # Use smoothed prediction like OpenCV code; the float32 conversion
+        # happens in the inference pool's scratch buffer
+        try:
+            smoothed_label, confidence = batched_recognizer.predict(sequence)
+        except ValueError:
+            return jsonify({"error": "Invalid data format: Sequence must be numbers"}), 400
         
-        # Apply confidence threshold
-        if confidence > MIN_CONFIDENCE:
-            if not history_of_signs or history_of_signs[-1] != smoothed_label:
-                history_of_signs.append(smoothed_label)
+        _update_history(history_of_signs, smoothed_label, confidence)
         
-        sentence = isl_to_english_sentence(history_of_signs)
-        return jsonify({
-            "label": smoothed_label,
-            "confidence": float(confidence),
-            "sentence": sentence,
-            "history": history_of_signs
-        })
+        sentence = _cached_sentence(tuple(history_of_signs))
+        return _prediction_response(smoothed_label, confidence, sentence, history_of_signs)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/predict_sequence_bin", methods=["POST"])
+def http_predict_sequence_bin():
+    """Fast path: raw little-endian float32 sequence body, history in the query string"""
+    if not recognizer:
+        return jsonify({"error": "Model not initialized"}), 500
+
+    try:
+        buf = request.get_data(cache=False)
+        if len(buf) != SEQUENCE_NBYTES:
+            return jsonify({"error": f"Invalid sequence size: {len(buf)} bytes"}), 400
+        sequence = np.frombuffer(buf, dtype='<f4', count=N_FRAMES * 144).reshape(N_FRAMES, 144)
+
+        history_of_signs = request.args.getlist("history")
+
+        smoothed_label, confidence = batched_recognizer.predict(sequence)
+
+        _update_history(history_of_signs, smoothed_label, confidence)
+
+        sentence = _cached_sentence(tuple(history_of_signs))
+        return _prediction_response(smoothed_label, confidence, sentence, history_of_signs)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -131,12 +359,10 @@ def http_generate_animation():
         return jsonify({"error": "No text provided"}), 400
     
     try:
-        video_path = generator.generate_video_from_text(text)
-        if video_path and os.path.exists(video_path):
-            # Create relative URL for the generated animation
-            relative_url = os.path.relpath(video_path, start=ROOT_DIR)
+        video_url = _generate_animation_url(text)
+        if video_url:
             return jsonify({
-                "video_url": f"/{relative_url.replace(os.sep, '/')}",
+                "video_url": video_url,
                 "status": "success",
                 "text": text
             })
@@ -162,17 +388,35 @@ def test_endpoint():
 def handle_connect():
     client_id = request.sid
     user_sessions[client_id] = {
-        'history': [], 
-        'last_prediction_time': 0
+        'history': deque(maxlen=MAX_HISTORY), 
+        'last_prediction_time': 0,
+        'last_sentence': ''
     }
-    emit('connection_response', {'status': 'connected'})
-    print(f"Client connected: {client_id}")
+    # Let the client self-throttle instead of pushing frames we would drop
+    emit('connection_response', {
+        'status': 'connected',
+        'min_interval_ms': int(MIN_PREDICTION_INTERVAL * 1000)
+    })
+    logger.debug("Client connected: %s", client_id)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     client_id = request.sid
     user_sessions.pop(client_id, None)
-    print(f"Client disconnected: {client_id}")
+    task = animation_tasks.pop(client_id, None)
+    if task is not None:
+        task.kill(block=False)
+    logger.debug("Client disconnected: %s", client_id)
+
+def _is_throttled(client_id):
+    """Allow at most one prediction per client every MIN_PREDICTION_INTERVAL seconds"""
+    current_time = time.time()
+    next_allowed = user_sessions[client_id]['last_prediction_time'] + MIN_PREDICTION_INTERVAL
+    if current_time < next_allowed:
+        emit('throttled', {'next_allowed_ms': int(next_allowed * 1000)})
+        return True
+    user_sessions[client_id]['last_prediction_time'] = current_time
+    return False
 
 @socketio.on('predict_sequence')
 def handle_prediction(data):
@@ -182,39 +426,84 @@ def handle_prediction(data):
         return
     
     try:
-        # Throttle predictions
-        current_time = time.time()
-        if current_time - user_sessions[client_id]['last_prediction_time'] < 0.3:
+        if _is_throttled(client_id):
             return
-        user_sessions[client_id]['last_prediction_time'] = current_time
         
-        sequence = np.array(data.get('sequence', []), dtype=np.float32)
-        history = user_sessions[client_id]['history']
-
-        if sequence.shape != (N_FRAMES, 144):
-            emit('prediction_error', {'error': f'Invalid sequence shape: {sequence.shape}'})
+        raw_sequence = data.get('sequence', ())
+        # Cheap sanity check before paying for the numpy allocation
+        try:
+            _validate_shape(raw_sequence)
+        except ValueError as e:
+            emit('prediction_error', {'error': str(e)})
             return
         
-        # Use smoothed prediction like OpenCV code
-        smoothed_label, confidence = recognizer.predict_sequence_smoothed(sequence)
-        
-        # Apply confidence threshold
-        if confidence > MIN_CONFIDENCE:
-            if not history or history[-1] != smoothed_label:
-                history.append(smoothed_label)
-                if len(history) > 20:
-                    history.pop(0)
-        
-        sentence = isl_to_english_sentence(history)
-        emit('prediction_result', {
-            'label': smoothed_label,
-            'confidence': float(confidence),
-            'sentence': sentence,
-            'history': history.copy()
-        })
+        # The float32 conversion happens on the inference pool, not here
+        _predict_and_emit(client_id, raw_sequence)
     except Exception as e:
         emit('prediction_error', {'error': str(e)})
 
+@socketio.on('predict_sequence_bin')
+def handle_prediction_bin(data):
+    """WebSocket fast path: binary frame of raw little-endian float32 keypoints"""
+    client_id = request.sid
+    if client_id not in user_sessions or not recognizer:
+        emit('prediction_error', {'error': 'Session or model not available'})
+        return
+
+    try:
+        if _is_throttled(client_id):
+            return
+
+        if not isinstance(data, (bytes, bytearray)) or len(data) != SEQUENCE_NBYTES:
+            emit('prediction_error', {'error': 'Invalid binary sequence'})
+            return
+        sequence = np.frombuffer(data, dtype='<f4', count=N_FRAMES * 144).reshape(N_FRAMES, 144)
+
+        _predict_and_emit(client_id, sequence)
+    except Exception as e:
+        emit('prediction_error', {'error': str(e)})
+
+def _predict_and_emit(client_id, sequence):
+    """Run inference on a keypoint sequence off the event loop and emit the result"""
+    session = user_sessions[client_id]
+    history = session['history']
+
+    # Each socket event already runs in its own greenlet, so waiting on the
+    # batcher only parks this client while the others keep being serviced
+    smoothed_label, confidence = batched_recognizer.predict(sequence)
+    
+    # The deque drops the oldest sign past MAX_HISTORY; only rebuild the
+    # sentence when the history actually changed
+    if _update_history(history, smoothed_label, confidence):
+        session['last_sentence'] = _cached_sentence(tuple(history))
+    
+    sentence = session['last_sentence']
+    # No external message queue is configured, so emit straight to the socket.
+    # list() is needed anyway because the deque isn't JSON serializable.
+    emit('prediction_result', _prediction_payload(smoothed_label, confidence, sentence, list(history)),
+         ignore_queue=True)
+
+def _generate_and_emit(client_id, text):
+    """Background task: render the animation and push the result to one client"""
+    try:
+        logger.debug("Generating animation for text: %s", text)
+        video_url = _generate_animation_url(text)
+        
+        if video_url:
+            socketio.emit('animation_result', {
+                'video_url': video_url, 
+                'text': text, 
+                'status': 'success'
+            }, to=client_id, ignore_queue=True)
+            logger.debug("Animation generated: %s", video_url)
+        else:
+            socketio.emit('animation_error', {'error': 'Could not generate animation'}, to=client_id)
+    except Exception as e:
+        socketio.emit('animation_error', {'error': str(e)}, to=client_id)
+    finally:
+        if animation_tasks.get(client_id) is gevent.getcurrent():
+            del animation_tasks[client_id]
+
 @socketio.on('generate_animation')
 def handle_generate_animation(data):
     """WebSocket: Text → ISL animation generation"""
@@ -228,20 +517,10 @@ def handle_generate_animation(data):
             emit('animation_error', {'error': 'No text provided'})
             return
         
-        print(f"Generating animation for text: {text}")
-        video_path = generator.generate_video_from_text(text)
-        
-        if video_path and os.path.exists(video_path):
-            relative_url = os.path.relpath(video_path, start=ROOT_DIR)
-            video_url = f"/{relative_url.replace(os.sep, '/')}"
-            emit('animation_result', {
-                'video_url': video_url, 
-                'text': text, 
-                'status': 'success'
-            })
-            print(f"Animation generated: {video_url}")
-        else:
-            emit('animation_error', {'error': 'Could not generate animation'})
+        # Acknowledge right away; the result arrives as animation_result later
+        emit('animation_pending', {'text': text}, ignore_queue=True)
+        client_id = request.sid
+        animation_tasks[client_id] = socketio.start_background_task(_generate_and_emit, client_id, text)
     except Exception as e:
         emit('animation_error', {'error': str(e)})
 
@@ -249,7 +528,10 @@ def handle_generate_animation(data):
 def handle_clear_history():
     client_id = request.sid
     if client_id in user_sessions:
-        user_sessions[client_id]['history'] = []
+        # Clear in place: a prediction still waiting on inference holds this
+        # same deque and must not write back a sentence for the old history
+        user_sessions[client_id]['history'].clear()
+        user_sessions[client_id]['last_sentence'] = ''
         recognizer.clear_buffer()
         
     emit('prediction_result', {
@@ -261,8 +543,8 @@ def handle_clear_history():
 
 # --- MAIN ---
 if __name__ == "__main__":
-    print("Starting ISL Recognition Server...")
-    print(f"Model: {os.path.basename(MODEL_PATH)}")
-    print(f"Classes: {len(np.load(CLASS_NAMES_PATH))} alphabets")
-    print(f"Animation generator: {'Available' if generator else 'Not available'}")
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    logger.info("Starting ISL Recognition Server...")
+    logger.info("Model: %s", os.path.basename(MODEL_PATH))
+    logger.info("Classes: %s alphabets", recognizer.num_classes if recognizer else 'n/a')
+    logger.info("Animation generator: %s", 'Available' if generator else 'Not available')
+    socketio.run(app, host='0.0.0.0', port=5000)
\ No newline at end of file
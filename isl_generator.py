@@ -1,21 +1,40 @@
 import os
+import re
 import json
+import logging
+import threading
 import cv2
 import numpy as np
 from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict
 import mediapipe as mp
 import spacy
 
-# Load spaCy English model
-try:
-    nlp = spacy.load("en_core_web_sm")
-    print("spaCy model loaded successfully")
-except OSError:
-    print("Downloading spaCy English model...")
-    from spacy.cli import download
-    download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+logger = logging.getLogger(__name__)
+
+# Only token.pos_ and token.is_alpha are used. POS needs tok2vec + tagger and
+# the attribute_ruler (which maps tags to coarse POS); skip everything else.
+SPACY_DISABLE = ["parser", "ner", "lemmatizer"]
+
+# spaCy English model, loaded on first use so importing this module stays cheap
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def _get_nlp():
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                try:
+                    _nlp = spacy.load("en_core_web_sm", disable=SPACY_DISABLE)
+                    logger.info("spaCy model loaded successfully")
+                except OSError:
+                    logger.info("Downloading spaCy English model...")
+                    from spacy.cli import download
+                    download("en_core_web_sm")
+                    _nlp = spacy.load("en_core_web_sm", disable=SPACY_DISABLE)
+    return _nlp
 
 mp_face_mesh = mp.solutions.face_mesh
 
@@ -28,12 +47,54 @@ FACE_COLOR = (224, 224, 224)
 FPS_ANIM = 25
 IMG_SIZE = (512, 512)
 
+# (fourcc, extension) in order of preference. H.264 is fast and plays in every
+# browser but needs an encoder most OpenCV wheels lack; VP8 WebM also plays in
+# browsers but encodes slowly in software; MPEG-4 Part 2 is the last resort.
+VIDEO_CODECS = (('avc1', '.mp4'), ('vp80', '.webm'), ('mp4v', '.mp4'))
+
+FINGERSPELL_CACHE_SIZE = 4096
+SIGN_CACHE_SIZE = 256
+RENDER_CHUNK = 32  # frames drawn in parallel before they are written out
+
+# Landmark index pairs, as arrays so a whole skeleton is drawn with one fancy index
+HAND_CONNECTIONS = np.array([
+    (0,1),(1,2),(2,3),(3,4),(0,5),(5,6),(6,7),(7,8),
+    (0,9),(9,10),(10,11),(11,12),(0,13),(13,14),(14,15),(15,16),
+    (0,17),(17,18),(18,19),(19,20),(5,9),(9,13),(13,17)
+], dtype=np.intp)
+POSE_CONNECTIONS = np.array([(11,12),(12,14),(14,16),(11,13),(13,15),(12,24),(11,23),(23,24)], dtype=np.intp)
+TORSO_INDICES = [11, 12, 24, 23]
+# Parts kept as point arrays; the face is reduced to its per-frame centre
+BODY_PARTS = ("pose", "left_hand", "right_hand")
+
+# Lowercase words, as walked through the phrase trie
+WORD_RE = re.compile(r'[a-z]+')
+# Common greetings. The longest one matching whole leading words of a
+# sentence is split off; order does not matter
+COMMON_PHRASES = ('good morning', 'good afternoon', 'good evening', 'good night', 'thank you', 'hello')
+NEGATION_WORDS = frozenset({'not', 'no', 'never', 'nothing'})
+COLOR_WORDS = frozenset({'red', 'blue', 'green', 'yellow', 'black', 'white', 
+                         'orange', 'pink', 'purple', 'brown', 'gray', 'grey',
+                         'violet', 'indigo', 'magenta', 'cyan', 'turquoise'})
+
+# apply_isl_grammar buckets, numbered in ISL word order
+SUBJECTS, OBJECTS, VERBS, ADJECTIVES, OTHERS, COLORS, NEGATIONS, QUESTIONS = range(8)
+NUM_BUCKETS = 8
+AUX_SKIP = -1
+POS_BUCKETS = {'NOUN': OBJECTS, 'VERB': VERBS, 'ADJ': ADJECTIVES}
+
 class ISLGenerator:
-    def __init__(self, gloss_map_path, data_dir):
+    def __init__(self, gloss_map_path, data_dir, video_format=None, render_threads=None):
         self.gloss_map_path = gloss_map_path
         self.data_dir = data_dir
         self.img_size = IMG_SIZE
         self.fps = FPS_ANIM
+        # None picks the fastest available codec; 'webm' forces VP8
+        self._video_codec = ('vp80', '.webm') if video_format == 'webm' else None
+        # Frames are independent, so they can be drawn concurrently (OpenCV releases
+        # the GIL while drawing). None uses every core; 1 draws them one by one.
+        render_threads = render_threads or os.cpu_count() or 1
+        self._render_executor = ThreadPoolExecutor(render_threads) if render_threads > 1 else None
         
         self.auxiliary_verbs = {'is', 'am', 'are', 'was', 'were', 'be', 'been', 'being', 
                                  'do', 'does', 'did', 'have', 'has', 'had', 'will', 'shall'}
@@ -51,6 +112,20 @@ class ISLGenerator:
         }
         
         self.gloss_map, self.phrase_trie = self._load_gloss_map()
+        
+        # One lookup per token instead of a chain of set-membership checks.
+        # Built lowest precedence first so auxiliaries win any overlap.
+        self._word_bucket = {}
+        self._word_bucket.update(dict.fromkeys(COLOR_WORDS, COLORS))
+        self._word_bucket.update(dict.fromkeys(NEGATION_WORDS, NEGATIONS))
+        self._word_bucket.update(dict.fromkeys(self.question_words, QUESTIONS))
+        self._word_bucket.update(dict.fromkeys(self.auxiliary_verbs, AUX_SKIP))
+        
+        # Greetings that actually have a gloss; they are matched through phrase_trie
+        self._common_phrases = frozenset(p for p in COMMON_PHRASES if p in self.gloss_map)
+        self._fingerspell_cache = {}
+        self._pos_cache = None  # word -> POS tag for context-independent words, tagged on first use
+        self._sign_cache = {}  # json_path -> sign arrays, least recently used first
 
     def _load_gloss_map(self):
         """Load gloss_map.json and build a phrase trie."""
@@ -71,18 +146,11 @@ class ISLGenerator:
                     node = node[word]
                 node['__END__'] = phrase
         except FileNotFoundError:
-            print(f"Warning: {self.gloss_map_path} not found. Text-to-ISL will not work.")
+            logger.warning("%s not found. Text-to-ISL will not work.", self.gloss_map_path)
         return gloss_map, phrase_trie
 
-    def _is_color_word(self, word):
-        colors = {'red', 'blue', 'green', 'yellow', 'black', 'white', 
-                  'orange', 'pink', 'purple', 'brown', 'gray', 'grey',
-                  'violet', 'indigo', 'magenta', 'cyan', 'turquoise'}
-        return word.lower() in colors
-
-    def _spacy_pos_tagging(self, sentence):
-        """Use spaCy for POS tagging."""
-        doc = nlp(sentence.lower())
+    def _extract_pos(self, doc):
+        """Collect (tokens, POS tags) for the alphabetic tokens of a tagged spaCy Doc."""
         tokens = []
         tags = []
         
@@ -94,70 +162,107 @@ class ISLGenerator:
         
         return tokens, tags
 
+    def _build_pos_cache(self):
+        """
+        Tag, once and each on its own, the words whose grammar bucket does not
+        depend on context: the _word_bucket words (bucketed by the word alone)
+        and pronouns. Content words such as 'drink' or 'light' change POS with
+        context, so sentences containing them still go through spaCy.
+        """
+        vocabulary = set(self._word_bucket) | set(self.pronoun_map)
+        
+        pos_cache = {}
+        for doc in _get_nlp().pipe(sorted(vocabulary), batch_size=256):
+            # Only words spaCy keeps as a single alphabetic token can be looked up by split()
+            if len(doc) != 1 or not doc[0].is_alpha:
+                continue
+            token = doc[0]
+            if token.text in self._word_bucket or token.pos_ == 'PRON':
+                pos_cache[token.text] = token.pos_
+        return pos_cache
+
+    def _cached_pos(self, sentence):
+        """(tokens, POS tags) from the word cache, or None if any word is unknown."""
+        if self._pos_cache is None:
+            self._pos_cache = self._build_pos_cache()
+        
+        tokens = sentence.lower().split()
+        try:
+            tags = [self._pos_cache[token] for token in tokens]
+        except KeyError:
+            return None
+        return tokens, tags
+
+    def _spacy_pos_tagging(self, sentence):
+        """Use spaCy for POS tagging, skipping it when every word is already in the POS cache."""
+        cached = self._cached_pos(sentence)
+        if cached is not None:
+            return cached
+        return self._extract_pos(_get_nlp()(sentence.lower()))
+
     def apply_isl_grammar(self, sentence):
         """
         Apply ISL grammar rules:
         1. Remove auxiliary verbs (as requested).
         2. Reorder remaining words (Subject + Object + Verb + Adjectives + Others + Colors + Negation + Questions).
-        """
-        if not sentence or not sentence.strip():
-            return []
         
-        tokens, tags = self._spacy_pos_tagging(sentence)
-
-        print(f"Original: {sentence}")
-        print(f"Tokens: {tokens}")
-        print(f"POS Tags: {tags}")
+        `sentence` is either a string or an already-tagged spaCy Doc.
+        """
+        if isinstance(sentence, str):
+            if not sentence.strip():
+                return []
+            tokens, tags = self._spacy_pos_tagging(sentence)
+        else:
+            if not sentence:
+                return []
+            tokens, tags = self._extract_pos(sentence)
+
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Original: %s", sentence)
+            logger.debug("Tokens: %s", tokens)
+            logger.debug("POS Tags: %s", tags)
         
         # --- ISL Grammar Step 1: Initialize categories ---
-        subjects, objects, verbs, adjectives, colors, negations, questions, others = [], [], [], [], [], [], [], []
+        # One bucket per category, indexed in ISL output order
+        buckets = [[] for _ in range(NUM_BUCKETS)]
         
         # --- ISL Grammar Step 2: Categorize and filter words ---
-        for i, (word, pos_tag) in enumerate(zip(tokens, tags)):
+        for word, pos_tag in zip(tokens, tags):
+            # Auxiliaries, question words, negations and colors are decided by
+            # the word alone: a single precomputed lookup
+            bucket = self._word_bucket.get(word)
             
             # **1. Filter Auxiliary Verbs FIRST**
-            if word in self.auxiliary_verbs:
-                print(f"Filtering auxiliary verb: {word}")
+            if bucket == AUX_SKIP:
+                logger.debug("Filtering auxiliary verb: %s", word)
                 continue
             
-            # 2. Identify question words (go to end)
-            if word in self.question_words:
-                questions.append(word)
-            # 3. Identify negation (go to end)
-            elif word in ['not', 'no', 'never', 'nothing']:
-                negations.append(word)
-            # 4. Identify colors (go to end)
-            elif self._is_color_word(word):
-                colors.append(word)
-            # 5. Identify subjects (pronouns and first nouns), apply pronoun mapping
-            elif pos_tag == 'PRON' or (pos_tag == 'NOUN' and not subjects and not objects):
-                subjects.append(self.pronoun_map.get(word, word))
-            # 6. Identify objects (nouns that come after subjects)
-            elif pos_tag == 'NOUN':
-                objects.append(word)
-            # 7. Identify verbs (main verbs, auxiliaries already filtered)
-            elif pos_tag == 'VERB':
-                verbs.append(word)
-            # 8. Identify adjectives (non-color)
-            elif pos_tag == 'ADJ':
-                adjectives.append(word)
-            # 9. Other words (adverbs, prepositions, etc.)
-            else:
-                others.append(word)
+            if bucket is None:
+                # Identify subjects (pronouns and first nouns), apply pronoun mapping
+                if pos_tag == 'PRON' or (pos_tag == 'NOUN' and not buckets[SUBJECTS] and not buckets[OBJECTS]):
+                    buckets[SUBJECTS].append(self.pronoun_map.get(word, word))
+                    continue
+                # Objects (later nouns), verbs, adjectives; everything else is "other"
+                bucket = POS_BUCKETS.get(pos_tag, OTHERS)
+            
+            buckets[bucket].append(word)
 
         # --- ISL Grammar Step 3: Combine in ISL Order ---
         # ISL word order: Subject + Object + Verb + Adjectives + Others + Colors + Negation + Questions
-        result = subjects + objects + verbs + adjectives + others + colors + negations + questions
+        result = [word for bucket in buckets for word in bucket]
         
-        print(f"ISL Word Order Breakdown:")
-        print(f"  Subjects: {subjects}")
-        print(f"  Objects: {objects}")
-        print(f"  Verbs: {verbs}")
-        print(f"  Adjectives: {adjectives}")
-        print(f"  Colors: {colors}")
-        print(f"  Negations: {negations}")
-        print(f"  Questions: {questions}")
-        print(f"  Final Order: {result}")
+        if debug:
+            subjects, objects, verbs, adjectives, others, colors, negations, questions = buckets
+            logger.debug("ISL Word Order Breakdown:")
+            logger.debug("  Subjects: %s", subjects)
+            logger.debug("  Objects: %s", objects)
+            logger.debug("  Verbs: %s", verbs)
+            logger.debug("  Adjectives: %s", adjectives)
+            logger.debug("  Colors: %s", colors)
+            logger.debug("  Negations: %s", negations)
+            logger.debug("  Questions: %s", questions)
+            logger.debug("  Final Order: %s", result)
         
         return result
 
@@ -194,101 +299,155 @@ class ISLGenerator:
                     glosses.append(word)
                 else:
                     # Finger-spelling fallback for unknown words
-                    for char in word:
-                        if char in self.gloss_map:
-                            glosses.append(char)
-                        else:
-                            print(f"Warning: No gloss for character '{char}', skipping.")
+                    glosses.extend(self._fingerspell(word))
                 i += 1
                 
         return glosses
 
-    def text_to_gloss(self, sentence):
-        """
-        Convert English text to ISL gloss sequence following ISL grammar rules, 
-        handling common phrases and remaining words.
-        """
+    def _fingerspell(self, word):
+        """Per-character glosses for an unknown word, computed once per distinct word."""
+        spelled = self._fingerspell_cache.get(word)
+        if spelled is None:
+            spelled = []
+            for char in word:
+                if char in self.gloss_map:
+                    spelled.append(char)
+                else:
+                    logger.warning("No gloss for character '%s', skipping.", char)
+            if len(self._fingerspell_cache) >= FINGERSPELL_CACHE_SIZE:
+                self._fingerspell_cache.clear()
+            self._fingerspell_cache[word] = spelled
+        return spelled
+
+    def _split_common_phrase(self, sentence):
+        """Split a leading common greeting off the sentence: (initial_glosses, remaining_sentence)."""
         sentence_lower = sentence.lower().strip()
         
-        # Define common greetings and their expected length
-        common_phrases = {
-            'good morning': 2, 'good afternoon': 2, 
-            'good evening': 2, 'good night': 2,
-            'thank you': 2, 'hello': 1
-        }
-        
-        # 1. Check for common greetings and separate the rest of the sentence
-        initial_glosses = []
-        remaining_sentence = sentence_lower
+        # Walk the phrase trie over the leading words, keeping the longest
+        # greeting; punctuation between words ends the phrase
+        node = self.phrase_trie
+        phrase = None
+        phrase_end = 0
+        pos = 0
+        for match in WORD_RE.finditer(sentence_lower):
+            if sentence_lower[pos:match.start()].strip():
+                break
+            node = node.get(match.group())
+            if node is None:
+                break
+            if node.get('__END__') in self._common_phrases:
+                phrase = node['__END__']
+                phrase_end = match.end()
+            pos = match.end()
         
-        for phrase, length in common_phrases.items():
-            if sentence_lower.startswith(phrase):
-                if phrase in self.gloss_map:
-                    print(f"Common phrase detected: {phrase}")
-                    # Add the entire phrase as one gloss token
-                    initial_glosses.append(phrase) 
-                    
-                    # Cut the common phrase part from the sentence
-                    remaining_sentence = sentence_lower[len(phrase):].strip()
-                    break
+        if phrase is None:
+            return [], sentence_lower
+        logger.debug("Common phrase detected: %s", phrase)
+        # Add the entire phrase as one gloss token, and cut it from the sentence
+        return [phrase], sentence_lower[phrase_end:].strip()
 
-        # 2. Process the remaining sentence using the full ISL grammar rules
-        if remaining_sentence:
-            # We must tokenise and tag the remaining sentence before applying grammar
-            remaining_tokens = [token.text for token in nlp(remaining_sentence) if token.is_alpha]
-            
-            # Apply the grammar rules to the remaining tokens
-            processed_remaining_tokens = self.apply_isl_grammar(" ".join(remaining_tokens))
-            
-            # Convert the remaining tokens to glosses
-            remaining_glosses = self._text_to_gloss_sequence(processed_remaining_tokens)
-        else:
-            remaining_glosses = []
+    def text_to_gloss_batch(self, sentences):
+        """
+        Convert several English sentences to ISL gloss sequences, tagging all of
+        them in a single nlp.pipe pass.
+        """
+        # 1. Check for common greetings and separate the rest of each sentence
+        splits = [self._split_common_phrase(sentence) for sentence in sentences]
+        
+        # Sentences made only of context-independent words are tagged from the
+        # POS cache. Tokenise and tag the rest exactly once; apply_isl_grammar
+        # takes the Doc as-is and skips non-alphabetic tokens itself
+        cached = [self._cached_pos(remaining) is not None if remaining else False
+                  for _, remaining in splits]
+        to_tag = [remaining for (_, remaining), hit in zip(splits, cached) if remaining and not hit]
+        docs = iter(_get_nlp().pipe(to_tag, batch_size=32) if to_tag else ())
+        
+        results = []
+        for (initial_glosses, remaining_sentence), hit in zip(splits, cached):
+            # 2. Process the remaining sentence using the full ISL grammar rules
+            if remaining_sentence:
+                processed_remaining_tokens = self.apply_isl_grammar(remaining_sentence if hit else next(docs))
+                remaining_glosses = self._text_to_gloss_sequence(processed_remaining_tokens)
+            else:
+                remaining_glosses = []
             
-        # 3. Combine initial glosses and remaining glosses
-        final_gloss_sequence = initial_glosses + remaining_glosses
+            # 3. Combine initial glosses and remaining glosses
+            final_gloss_sequence = initial_glosses + remaining_glosses
+            logger.debug("Final gloss sequence: %s", final_gloss_sequence)
+            results.append(final_gloss_sequence)
         
-        print(f"Final gloss sequence: {final_gloss_sequence}")
-        return final_gloss_sequence
-
-    def _draw_skeleton_on_frame(self, canvas, frame_data):
-        if not frame_data:
-            return
+        return results
 
-        def get_point_coords(point):
-            return (int(point['x'] * self.img_size[0]), int(point['y'] * self.img_size[1]))
+    def text_to_gloss(self, sentence):
+        """
+        Convert English text to ISL gloss sequence following ISL grammar rules, 
+        handling common phrases and remaining words.
+        """
+        return self.text_to_gloss_batch([sentence])[0]
 
-        def fill_torso(pose_points):
-            if not pose_points or len(pose_points) < 25:
+    def _sign_to_arrays(self, sign_data):
+        """
+        Convert a sign's frames (dicts of landmark-dict lists) to a Structure of Arrays:
+        per body part an (F, N, 2) float32 array of whole-pixel coordinates, NaN where a
+        point is missing, plus the per-frame point counts since parts can be absent in
+        some frames. The face mesh is only drawn through its centroid, so it is kept as
+        an (F, 2) array of per-frame centres, NaN where no face point is present.
+        """
+        num_frames = len(sign_data)
+
+        def part_to_array(part):
+            per_frame = [(frame or {}).get(part) or [] for frame in sign_data]
+            counts = [len(points) for points in per_frame]
+            xy = np.full((num_frames, max(counts, default=0), 2), np.nan)
+            for f, points in enumerate(per_frame):
+                for idx, point in enumerate(points):
+                    if point and 'x' in point and 'y' in point:
+                        xy[f, idx] = (point['x'], point['y'])
+            return xy * self.img_size, counts
+
+        sign = {'num_frames': num_frames, 'present': [bool(frame) for frame in sign_data]}
+        for part in BODY_PARTS:
+            xy, counts = part_to_array(part)
+            # Drawing truncates to whole pixels anyway, which float32 holds exactly
+            sign[part] = (np.trunc(xy).astype(np.float32), counts)
+
+        face_xy, face_counts = part_to_array("face")
+        face_center = np.full((num_frames, 2), np.nan, dtype=np.float32)
+        for f, count in enumerate(face_counts):
+            if count == 0:
+                face_center[f] = (self.img_size[0] // 2, self.img_size[1] // 3)
+                continue
+            present = face_xy[f, :count]
+            present = present[~np.isnan(present).any(axis=1)]
+            if len(present):
+                face_center[f] = np.trunc(present.mean(axis=0))
+        sign["face"] = face_center
+        return sign
+
+    def _frame_views(self, sign, f):
+        """Per-part (N, 2) views of frame `f` of a sign built by _sign_to_arrays, plus its face centre."""
+        views = {"face": sign["face"][f]}
+        for part in BODY_PARTS:
+            xy, counts = sign[part]
+            views[part] = xy[f, :counts[f]]
+        return views
+
+    def _draw_skeleton_on_frame(self, canvas, frame_xy):
+        """Draw one frame given per-part (N, 2) pixel arrays and the face centre (see _frame_views)."""
+
+        def fill_torso(pose_xy):
+            if len(pose_xy) < 25:
                 return
-            required_indices = [11, 12, 23, 24]
-            if all(idx < len(pose_points) and pose_points[idx] for idx in required_indices):
-                pts = [pose_points[11], pose_points[12], pose_points[24], pose_points[23]]
-                pts_array = np.array([[int(p['x']*self.img_size[0]), int(p['y']*self.img_size[1])] for p in pts], np.int32)
-                cv2.fillPoly(canvas, [pts_array], (200, 150, 100))
-
-        def draw_smiling_face(face_points):
-            # The existing logic for drawing the face is functional, no changes needed
-            if not face_points:
-                center_x, center_y = self.img_size[0] // 2, self.img_size[1] // 3
-                head_radius = 40
-                cv2.circle(canvas, (center_x, center_y), head_radius, (255, 224, 189), -1)
-                cv2.circle(canvas, (center_x, center_y), head_radius, (0, 0, 0), 2)
-                eye_y = center_y - 10
-                eye_offset = 15
-                cv2.circle(canvas, (center_x - eye_offset, eye_y), 5, (0, 0, 0), -1)
-                cv2.circle(canvas, (center_x + eye_offset, eye_y), 5, (0, 0, 0), -1)
-                mouth_y = center_y + 10
-                cv2.ellipse(canvas, (center_x, mouth_y), (20, 15), 0, 0, 180, (0, 0, 0), 3)
+            pts = pose_xy[TORSO_INDICES]
+            if not np.isnan(pts).any():
+                cv2.fillPoly(canvas, [pts.astype(np.int32)], (200, 150, 100))
+
+        def draw_smiling_face(face_center):
+            # NaN: the frame has face points but none of them present
+            if np.isnan(face_center).any():
                 return
+            center_x, center_y = int(face_center[0]), int(face_center[1])
             
-            # Existing logic for drawing a face based on landmarks
-            xs = [p['x'] for p in face_points if 'x' in p]
-            ys = [p['y'] for p in face_points if 'y' in p]
-            if not xs or not ys: return
-            
-            center_x = int(np.mean(xs) * self.img_size[0])
-            center_y = int(np.mean(ys) * self.img_size[1])
             head_radius = 40
             cv2.circle(canvas, (center_x, center_y), head_radius, (255, 224, 189), -1)
             cv2.circle(canvas, (center_x, center_y), head_radius, (0, 0, 0), 2)
@@ -299,90 +458,111 @@ class ISLGenerator:
             mouth_y = center_y + 10
             cv2.ellipse(canvas, (center_x, mouth_y), (20, 15), 0, 0, 180, (0, 0, 0), 3)
 
-        def draw_connections(points, connections, color, thickness=3):
-            if not points: return
-            for start_idx, end_idx in connections:
-                if (len(points) > max(start_idx, end_idx) and 
-                    points[start_idx] and points[end_idx] and
-                    'x' in points[start_idx] and 'y' in points[start_idx] and
-                    'x' in points[end_idx] and 'y' in points[end_idx]):
-                    cv2.line(canvas, get_point_coords(points[start_idx]),
-                             get_point_coords(points[end_idx]), color, thickness, cv2.LINE_AA)
-
-        def draw_points(points, color, size=4):
-            if not points: return
-            for point in points:
-                if point and 'x' in point and 'y' in point:
-                    cv2.circle(canvas, get_point_coords(point), size, color, -1, cv2.LINE_AA)
-
-        HAND_CONNECTIONS = [
-            (0,1),(1,2),(2,3),(3,4),(0,5),(5,6),(6,7),(7,8),
-            (0,9),(9,10),(10,11),(11,12),(0,13),(13,14),(14,15),(15,16),
-            (0,17),(17,18),(18,19),(19,20),(5,9),(9,13),(13,17)
-        ]
-        POSE_CONNECTIONS = [(11,12),(12,14),(14,16),(11,13),(13,15),(12,24),(11,23),(23,24)]
-
-        pose_data = frame_data.get("pose", [])
-        left_hand_data = frame_data.get("left_hand", [])
-        right_hand_data = frame_data.get("right_hand", [])
-
-        fill_torso(pose_data)
-        draw_smiling_face(frame_data.get("face", []))
-
-        draw_connections(pose_data, POSE_CONNECTIONS, SKELETON_COLOR, thickness=3)
-        draw_connections(left_hand_data, HAND_CONNECTIONS, HAND_COLOR, thickness=2)
-        draw_connections(right_hand_data, HAND_CONNECTIONS, HAND_COLOR, thickness=2)
-        
-       
+        def draw_connections(xy, connections, color, thickness=3):
+            # Keep only the connections whose endpoints both exist, then draw
+            # all of them as 2-point polylines in a single OpenCV call
+            connections = connections[(connections < len(xy)).all(axis=1)]
+            if len(connections) == 0:
+                return
+            segments = xy[connections]
+            segments = segments[~np.isnan(segments).any(axis=(1, 2))]
+            if len(segments):
+                cv2.polylines(canvas, segments.astype(np.int32), False, color, thickness, cv2.LINE_AA)
+
+        pose_xy = frame_xy["pose"]
+        left_hand_xy = frame_xy["left_hand"]
+        right_hand_xy = frame_xy["right_hand"]
+
+        fill_torso(pose_xy)
+        draw_smiling_face(frame_xy["face"])
+
+        draw_connections(pose_xy, POSE_CONNECTIONS, SKELETON_COLOR, thickness=3)
+        draw_connections(left_hand_xy, HAND_CONNECTIONS, HAND_COLOR, thickness=2)
+        draw_connections(right_hand_xy, HAND_CONNECTIONS, HAND_COLOR, thickness=2)
+
+    def _render_frame(self, canvas, sign, f):
+        """Clear `canvas` and draw frame `f` of a sign onto it."""
+        canvas[:] = BG_COLOR
+        if sign['present'][f]:
+            self._draw_skeleton_on_frame(canvas, self._frame_views(sign, f))
+
+    def _open_video_writer(self, basename):
+        """
+        Open a VideoWriter with the first codec this OpenCV build can encode.
+        The working codec is remembered so later videos skip the probing.
+        """
+        candidates = [self._video_codec] if self._video_codec else VIDEO_CODECS
+        for fourcc, extension in candidates:
+            path = os.path.join(self.data_dir, basename + extension)
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), self.fps, self.img_size)
+            if writer.isOpened():
+                self._video_codec = (fourcc, extension)
+                return writer, path
+            writer.release()
+        return None, None
 
     def generate_video_from_text(self, text: str) -> str:
         """Generate video from text using ISL grammar processing."""
         tokens = self.text_to_gloss(text)
-        combined_poses = []
+        signs = []
         
         if not tokens:
-            print("No tokens generated from text")
+            logger.warning("No tokens generated from text")
             return None
 
         for token in tokens:
             json_path = self.gloss_map.get(token.lower(), None) # Ensure lowercase lookup
-            if json_path and os.path.exists(json_path):
+            sign = self._sign_cache.pop(json_path, None) if json_path else None
+            if sign is None and json_path and os.path.exists(json_path):
                 try:
                     with open(json_path, 'r') as f:
                         sign_data = json.load(f)
-                        combined_poses.extend(sign_data)
+                    if sign_data:
+                        sign = self._sign_to_arrays(sign_data)
                 except json.JSONDecodeError:
-                    print(f"Error: Invalid JSON in {json_path}")
-            else:
-                print(f"Warning: No data for token: '{token}'")
-
-        if not combined_poses:
-            print("No pose data collected")
+                    logger.error("Invalid JSON in %s", json_path)
+            elif sign is None:
+                logger.warning("No data for token: '%s'", token)
+            
+            if sign is not None:
+                # (Re)insert as most recently used; evict the least recently used
+                if len(self._sign_cache) >= SIGN_CACHE_SIZE:
+                    self._sign_cache.pop(next(iter(self._sign_cache)))
+                self._sign_cache[json_path] = sign
+                signs.append(sign)
+
+        if not signs:
+            logger.warning("No pose data collected")
             return None
 
-        # Use .webm extension for browser compatibility
-        final_name = f"animation_{uuid4().hex[:8]}.webm"
-        final_path = os.path.join(self.data_dir, final_name)
-        
         os.makedirs(self.data_dir, exist_ok=True)
         
-        # 'mp4v' is widely supported on Linux servers without extra drivers
-        # 'vp80' creates WebM videos which play in all browsers and work on Linux
-        fourcc = cv2.VideoWriter_fourcc(*'vp80')
-        video_out = cv2.VideoWriter(final_path, fourcc, self.fps, self.img_size)
-
-        for frame_data in combined_poses:
-            canvas = np.full((self.img_size[1], self.img_size[0], 3), 255, dtype=np.uint8)
-            canvas[:] = BG_COLOR
-            self._draw_skeleton_on_frame(canvas, frame_data)
-            video_out.write(canvas)
+        video_out, final_path = self._open_video_writer(f"animation_{uuid4().hex[:8]}")
+        if video_out is None:
+            logger.error("Could not open a video writer in %s", self.data_dir)
+            return None
+
+        # Draw a chunk of frames into one reused buffer, then write them in order
+        frames = [(sign, f) for sign in signs for f in range(sign['num_frames'])]
+        buffer = np.empty((min(RENDER_CHUNK, len(frames)), self.img_size[1], self.img_size[0], 3), dtype=np.uint8)
+        for start in range(0, len(frames), RENDER_CHUNK):
+            chunk = frames[start:start + RENDER_CHUNK]
+            canvases = buffer[:len(chunk)]
+            if self._render_executor:
+                list(self._render_executor.map(self._render_frame, canvases, *zip(*chunk)))
+            else:
+                for canvas, (sign, f) in zip(canvases, chunk):
+                    self._render_frame(canvas, sign, f)
+            for canvas in canvases:
+                video_out.write(canvas)
         
         video_out.release()
-        print(f"Video saved at: {final_path}")
+        logger.info("Video saved at: %s", final_path)
         return final_path
 
 # Test the ISL grammar system
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
     generator = ISLGenerator("gloss_map.json", "output")
     
     test_sentences = [
@@ -393,9 +573,10 @@ if __name__ == "__main__":
         "good morning teacher"
     ]
     
-    for sentence in test_sentences:
+    gloss_sequences = generator.text_to_gloss_batch(test_sentences)
+    
+    for sentence, gloss_sequence in zip(test_sentences, gloss_sequences):
         print(f"\n{'='*60}")
         print(f"Testing: {sentence}")
         print(f"{'='*60}")
-        gloss_sequence = generator.text_to_gloss(sentence) 
         print(f"Final gloss sequence: {gloss_sequence}")
@@ -1,60 +1,177 @@
+import logging
+import threading
 import tensorflow as tf
 import numpy as np
-from collections import deque, Counter
+import xxhash
+from collections import deque, Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+PREDICTION_CACHE_SIZE = 50
+
+# (model_path, num_threads, delegate_path) -> (interpreter, lock)
+_INTERPRETERS = {}
+_INTERPRETERS_LOCK = threading.Lock()
+
+def _load_interpreter(model_path, num_threads, delegate_path):
+    # Explicit, small thread count so concurrent work doesn't oversubscribe the cores.
+    # The stock CPU interpreter already applies XNNPACK; delegate_path adds an
+    # external delegate (e.g. a GPU or standalone XNNPACK build) on top.
+    delegates = []
+    if delegate_path:
+        try:
+            delegates.append(tf.lite.experimental.load_delegate(delegate_path))
+            logger.info("Loaded TFLite delegate %s", delegate_path)
+        except (ValueError, OSError) as e:
+            logger.warning("Could not load TFLite delegate %s, using CPU: %s", delegate_path, e)
+    interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads,
+                                      experimental_delegates=delegates or None)
+    interpreter.allocate_tensors()
+    return interpreter
+
+def _shared_interpreter(model_path, num_threads, delegate_path):
+    """Create the interpreter for a model once per process and hand out the same one afterwards"""
+    key = (model_path, num_threads, delegate_path)
+    with _INTERPRETERS_LOCK:
+        if key not in _INTERPRETERS:
+            _INTERPRETERS[key] = (_load_interpreter(model_path, num_threads, delegate_path), threading.Lock())
+        return _INTERPRETERS[key]
 
 class ISLRecognizer:
-    def __init__(self, model_path, class_names_path):
+    def __init__(self, model_path, class_names_path, num_threads=2, delegate_path=None, max_batch=8):
         """ISL Alphabet Recognizer - Simplified to match OpenCV version"""
-        print("Loading ISL Recognizer...")
+        logger.info("Loading ISL Recognizer...")
         
         # Load class names
         self.label_classes = np.load(class_names_path, allow_pickle=True)
-        print(f"Loaded {len(self.label_classes)} classes")
+        self.num_classes = len(self.label_classes)
+        logger.info("Loaded %d classes", self.num_classes)
         
-        # Load model
-        self.interpreter = tf.lite.Interpreter(model_path=model_path)
-        self.interpreter.allocate_tensors()
+        # Instances built from the same model share one interpreter (and its
+        # allocated tensors); the per-instance state is the labels, buffer and cache.
+        self.interpreter, self._interpreter_lock = _shared_interpreter(model_path, num_threads, delegate_path)
         self.input_details = self.interpreter.get_input_details()
         self.output_details = self.interpreter.get_output_details()
+        self._input_tensor = self.interpreter.tensor(self.input_details[0]['index'])
+        
+        # Only a dynamic (-1) batch dimension can be resized. Fixed-batch exports,
+        # common for LSTMs, are fed in chunks of their own batch size instead.
+        signature = self.input_details[0].get('shape_signature')
+        self._dynamic_batch = signature is not None and len(signature) > 0 and signature[0] == -1
+        self.max_batch = max_batch if self._dynamic_batch else int(self.input_details[0]['shape'][0])
+        # Input sizes a dynamic model is resized between: lone requests, the
+        # common single-client case, run at 1 and any overlap runs at max_batch
+        self._batch_sizes = (1, self.max_batch) if self._dynamic_batch else (self.max_batch,)
         
         # Label buffer for smoothing (same as OpenCV code)
         self.label_buffer = deque(maxlen=5)
         
-    def predict_sequence(self, sequence):
+        # Recent predictions keyed by _get_sequence_hash
+        self._prediction_cache = OrderedDict()
+        
+    def _normalize(self, batch):
+        """Per-sequence standardization of a (N, 30, 144) float32 batch, in place"""
+        # This MUST match exactly what you did in training
+        mean = batch.mean(axis=(1, 2), keepdims=True)
+        std = batch.std(axis=(1, 2), keepdims=True) + 1e-8
+        batch -= mean
+        batch /= std
+        return batch
+
+    @property
+    def batch_size(self):
+        # Read from the interpreter, since another instance may have resized it
+        return self._input_tensor().shape[0]
+
+    def _resize_batch(self, batch_size):
+        """Resize the input tensor to the smallest of _batch_sizes that fits `batch_size`"""
+        if not self._dynamic_batch:
+            return
+        batch_size = next(size for size in self._batch_sizes if size >= batch_size)
+        if batch_size == self.batch_size:
+            return
+        self.interpreter.resize_tensor_input(self.input_details[0]['index'], [batch_size, 30, 144])
+        self.interpreter.allocate_tensors()
+
+    def _get_sequence_hash(self, sequence):
+        """64-bit xxh3 of the raw float32 bytes, hashed in place without a tobytes() copy"""
+        sequence = np.ascontiguousarray(sequence, dtype=np.float32)
+        return xxhash.xxh3_64_intdigest(memoryview(sequence).cast('B'))
+
+    def _cached_prediction(self, seq_hash):
+        """LRU lookup: a hit becomes the most recently used entry"""
+        prediction = self._prediction_cache.get(seq_hash)
+        if prediction is not None:
+            self._prediction_cache.move_to_end(seq_hash)
+        return prediction
+
+    def _cache_prediction(self, seq_hash, prediction):
+        if len(self._prediction_cache) >= PREDICTION_CACHE_SIZE:
+            self._prediction_cache.popitem(last=False)
+        self._prediction_cache[seq_hash] = prediction
+
+    def _invoke_batch(self, sequences):
+        """Run (30, 144) sequences through invoke(), up to max_batch per call"""
+        results = []
+        for start in range(0, len(sequences), self.max_batch):
+            # TFLite interpreters are not thread-safe; hold the lock from resize to read-back
+            with self._interpreter_lock:
+                results.extend(self._invoke_batch_locked(sequences[start:start + self.max_batch]))
+        return results
+
+    def _invoke_batch_locked(self, sequences):
+        # Only pad within the chosen size, so a lone request never pays for
+        # max_batch rows of LSTM compute
+        self._resize_batch(len(sequences))
+        
+        # Copy straight into the interpreter's own input buffer and normalize
+        # there. The view must be dropped before invoke(), which refuses to run
+        # while numpy arrays still reference its internal tensors.
+        input_data = self._input_tensor()
+        for i, sequence in enumerate(sequences):
+            input_data[i] = sequence
+        input_data[len(sequences):] = 0
+        self._normalize(input_data)
+        del input_data
+        
+        self.interpreter.invoke()
+        output_data = self.interpreter.get_tensor(self.output_details[0]['index'])[:len(sequences)]
+        
+        results = []
+        for scores in output_data:
+            pred_idx = np.argmax(scores)
+            results.append((str(self.label_classes[pred_idx]), float(scores[pred_idx])))
+        return results
+
+    def predict_batch(self, sequences):
+        """
+        Predict (label, confidence) for several (30, 144) sequences. Exact repeats,
+        e.g. the all-zero sequences sent while no hands are in view, are served
+        from a small cache; the rest share invoke() calls of up to max_batch.
+        """
         try:
-            if sequence.shape != (30, 144):
-                return "error", 0.0
-            
-            # --- ADDED NORMALIZATION HERE ---
-            # This MUST match exactly what you did in training
-            sequence = np.array(sequence)
-            mean = np.mean(sequence)
-            std = np.std(sequence) + 1e-8
-            sequence = (sequence - mean) / std
-            # --------------------------------
-            
-            input_data = np.expand_dims(sequence, axis=0).astype(np.float32)
+            for sequence in sequences:
+                if sequence.shape != (30, 144):
+                    return [("error", 0.0)] * len(sequences)
             
-            self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
-            self.interpreter.invoke()
-            output_data = self.interpreter.get_tensor(self.output_details[0]['index'])
-            
-            pred_idx = np.argmax(output_data[0])
-            confidence = float(output_data[0][pred_idx])
-            label = str(self.label_classes[pred_idx])
-            
-            return label, confidence
+            hashes = [self._get_sequence_hash(s) for s in sequences]
+            results = [self._cached_prediction(h) for h in hashes]
+            misses = [i for i, result in enumerate(results) if result is None]
+            if misses:
+                predictions = self._invoke_batch([sequences[i] for i in misses])
+                for i, prediction in zip(misses, predictions):
+                    results[i] = prediction
+                    self._cache_prediction(hashes[i], prediction)
+            return results
             
         except Exception as e:
-            print(f"Prediction error: {e}")
-            return "error", 0.0 
-        
-    def predict_sequence_smoothed(self, sequence):
-        """
-        Predict with label smoothing - same as OpenCV code
-        """
-        label, confidence = self.predict_sequence(sequence)
-        
+            logger.error("Prediction error: %s", e)
+            return [("error", 0.0)] * len(sequences)
+
+    def predict_sequence(self, sequence):
+        return self.predict_batch([sequence])[0]
+
+    def _smooth(self, label, confidence):
         # Apply confidence threshold and buffer logic
         if confidence > 0.65:
             self.label_buffer.append(label)
@@ -65,6 +182,17 @@ class ISLRecognizer:
             return smoothed_label, confidence
         else:
             return label, confidence
+        
+    def predict_sequence_smoothed(self, sequence):
+        """
+        Predict with label smoothing - same as OpenCV code
+        """
+        label, confidence = self.predict_sequence(sequence)
+        return self._smooth(label, confidence)
+
+    def predict_batch_smoothed(self, sequences):
+        """Batched predict_sequence_smoothed; smoothing is applied in arrival order"""
+        return [self._smooth(label, confidence) for label, confidence in self.predict_batch(sequences)]
     
     def clear_buffer(self):
         """Clear the label buffer"""
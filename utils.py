@@ -1,3 +1,88 @@
+import re
+import sys
+import functools
+import numpy as np
+
+# Grammar rules and transformations. Built once at import; the word literals
+# are interned by the compiler, and incoming signs are interned to match.
+SUBJECT_VERBS = {
+    'i': 'am',
+    'he': 'is', 
+    'she': 'is',
+    'it': 'is',
+    'we': 'are',
+    'you': 'are',
+    'they': 'are',
+    'this': 'is',
+    'that': 'is'
+}
+
+QUESTION_WORDS = frozenset({'what', 'why', 'how', 'when', 'where', 'who', 'which'})
+QUESTION_PREFIXES = tuple(QUESTION_WORDS)
+HELPING_VERBS = frozenset({'am', 'is', 'are', 'was', 'were', 'do', 'does', 'did', 'have', 'has', 'can', 'will'})
+
+# Final cleanup: stray spaces before punctuation, double verbs, double spaces
+FIXUP_REPLACEMENTS = {' ?': '?', ' .': '.', 'am are': 'am', 'is are': 'is', '  ': ' '}
+FIXUP_RE = re.compile('|'.join(re.escape(fragment) for fragment in FIXUP_REPLACEMENTS))
+
+def _fixup(match):
+    return FIXUP_REPLACEMENTS[match.group(0)]
+
+# The same short sign sequences recur as the recognizer stabilises
+SENTENCE_CACHE_SIZE = 1024
+
+# Common ISL patterns to English conversions
+PATTERN_REPLACEMENTS = {
+    ('you', 'name', 'what'): 'What is your name?',
+    ('how', 'you'): 'How are you?',
+    ('what', 'your', 'name'): 'What is your name?',
+    ('my', 'name'): 'My name is',
+    ('i', 'am', 'fine'): 'I am fine',
+    ('thank', 'you'): 'Thank you',
+    ('you', 'how'): 'How are you?',
+    ('what', 'this'): 'What is this?',
+    ('where', 'you', 'from'): 'Where are you from?',
+}
+
+def _generate_pattern_matchers(patterns):
+    """
+    Compile the pattern table into {first sign: matcher}, where each matcher is
+    a generated function of unrolled comparisons over the remaining signs:
+    matcher(signs) -> replacement or None. Longer patterns are tested first so
+    the longest match wins.
+    """
+    by_first = {}
+    for pattern, replacement in sorted(patterns.items(), key=lambda item: -len(item[0])):
+        by_first.setdefault(pattern[0], []).append((pattern, replacement))
+    
+    lines = []
+    for index, candidates in enumerate(by_first.values()):
+        lines.append(f"def _match_{index}(signs):")
+        lines.append("    n = len(signs)")
+        for pattern, replacement in candidates:
+            conditions = [f"n >= {len(pattern)}"]
+            conditions += [f"signs[{i}] == {sign!r}" for i, sign in enumerate(pattern) if i]
+            lines.append(f"    if {' and '.join(conditions)}:")
+            lines.append(f"        return {replacement!r}")
+        lines.append("    return None")
+    
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return {first: namespace[f"_match_{index}"] for index, first in enumerate(by_first)}
+
+# Built once at import; regenerate after changing PATTERN_REPLACEMENTS
+PATTERN_MATCHERS = _generate_pattern_matchers(PATTERN_REPLACEMENTS)
+
+def _clean_signs(recognized_signs):
+    """Stripped, lowercased, interned signs as a tuple; blanks dropped. str() only for non-str signs"""
+    cleaned = []
+    for sign in recognized_signs:
+        text = sign if type(sign) is str else str(sign)
+        text = text.strip()
+        if text:
+            cleaned.append(sys.intern(text.lower()))
+    return tuple(cleaned)
+
 def isl_to_english_sentence(recognized_signs: list) -> str:
     """
     Enhanced NLP function to convert ISL signs to proper English sentences
@@ -7,108 +92,104 @@ def isl_to_english_sentence(recognized_signs: list) -> str:
         return ""
     
     # Convert to lowercase and clean
-    temp_signs = [str(sign).lower().strip() for sign in recognized_signs if str(sign).strip()]
+    temp_signs = _clean_signs(recognized_signs)
     
     if not temp_signs:
         return ""
     
-    # Grammar rules and transformations
-    subject_verbs = {
-        'i': 'am',
-        'he': 'is', 
-        'she': 'is',
-        'it': 'is',
-        'we': 'are',
-        'you': 'are',
-        'they': 'are',
-        'this': 'is',
-        'that': 'is'
-    }
-    
-    question_words = {'what', 'why', 'how', 'when', 'where', 'who', 'which'}
-    helping_verbs = {'am', 'is', 'are', 'was', 'were', 'do', 'does', 'did', 'have', 'has', 'can', 'will'}
-    
-    # Common ISL patterns to English conversions
-    pattern_replacements = {
-        ('you', 'name', 'what'): 'What is your name?',
-        ('how', 'you'): 'How are you?',
-        ('what', 'your', 'name'): 'What is your name?',
-        ('my', 'name'): 'My name is',
-        ('i', 'am', 'fine'): 'I am fine',
-        ('thank', 'you'): 'Thank you',
-        ('you', 'how'): 'How are you?',
-        ('what', 'this'): 'What is this?',
-        ('where', 'you', 'from'): 'Where are you from?',
-    }
-    
-    # Check for exact pattern matches first
-    signs_tuple = tuple(temp_signs)
-    for pattern, replacement in pattern_replacements.items():
-        if len(signs_tuple) >= len(pattern) and signs_tuple[:len(pattern)] == pattern:
+    return _signs_to_sentence(temp_signs)
+
+@functools.lru_cache(maxsize=SENTENCE_CACHE_SIZE)
+def _signs_to_sentence(temp_signs):
+    """The rule engine behind isl_to_english_sentence, memoized on the cleaned signs tuple"""
+    # A single sign matches no pattern and no reordering rule: it is just
+    # capitalized and punctuated
+    if len(temp_signs) == 1:
+        word = temp_signs[0]
+        sentence = word.capitalize() + ('?' if word.startswith(QUESTION_PREFIXES) else '.')
+        return FIXUP_RE.sub(_fixup, sentence)
+    
+    # Check for exact pattern matches first. Most sentences start with a sign
+    # that begins no pattern, and the first-sign lookup alone rules them out
+    matcher = PATTERN_MATCHERS.get(temp_signs[0])
+    if matcher is not None:
+        replacement = matcher(temp_signs)
+        if replacement is not None:
             return replacement
     
-    # Process sentence structure
+    # Process sentence structure, one (previous, current, next) window per sign
     processed_words = []
-    i = 0
+    leading_qword = None
+    qword_seen = False
+    skip = False
     
-    while i < len(temp_signs):
-        current_word = temp_signs[i]
-        next_word = temp_signs[i + 1] if i + 1 < len(temp_signs) else None
-        prev_word = temp_signs[i - 1] if i > 0 else None
+    for prev_word, current_word, next_word in zip((None,) + temp_signs, temp_signs, temp_signs[1:] + (None,)):
+        # The previous sign consumed this one as its pair
+        if skip:
+            skip = False
+            continue
         
         # Handle subject-verb agreement
-        if current_word in subject_verbs and next_word and next_word not in helping_verbs:
-            if next_word not in question_words:  # Don't insert verb before question words
+        if current_word in SUBJECT_VERBS and next_word and next_word not in HELPING_VERBS:
+            if next_word not in QUESTION_WORDS:  # Don't insert verb before question words
                 processed_words.append(current_word)
-                processed_words.append(subject_verbs[current_word])
-                i += 1
+                processed_words.append(SUBJECT_VERBS[current_word])
                 continue
         
         # Handle questions
-        if current_word in question_words:
-            # Question word goes to the beginning
-            if processed_words and processed_words[0] not in question_words:
-                processed_words.insert(0, current_word)
-            else:
-                processed_words.append(current_word)
-            i += 1
+        if current_word in QUESTION_WORDS:
+            # Question word goes to the beginning, unless the sentence already
+            # starts with one. Only the first question word can move; it is
+            # remembered and inserted after the loop, later ones are appended
+            if not qword_seen:
+                qword_seen = True
+                if processed_words and processed_words[0] not in QUESTION_WORDS:
+                    leading_qword = current_word
+                    continue
+            processed_words.append(current_word)
             continue
         
         # Handle possessives
         if current_word == 'your' and next_word == 'name':
             processed_words.extend(['what', 'is', 'your', 'name'])
-            i += 2
+            skip = True
             continue
             
         if current_word == 'my' and next_word == 'name':
             processed_words.extend(['my', 'name', 'is'])
-            i += 2
+            skip = True
             continue
         
         # Basic word order corrections
         if current_word == 'you' and next_word == 'how':
             processed_words.extend(['how', 'are', 'you'])
-            i += 2
+            skip = True
             continue
             
         if current_word == 'name' and prev_word == 'your':
             # Already handled above
-            i += 1
             continue
         
         # Default: just add the word
         processed_words.append(current_word)
-        i += 1
+    
+    if leading_qword is not None:
+        processed_words.insert(0, leading_qword)
     
     # Final sentence cleaning and formatting
     if not processed_words:
         return ""
     
-    # Remove consecutive duplicates but preserve meaning
-    final_words = []
-    for word in processed_words:
-        if not final_words or word != final_words[-1]:
-            final_words.append(word)
+    # Remove consecutive duplicates but preserve meaning, compacting the
+    # list in place: `kept` words survive, in order
+    kept = 1
+    for read in range(1, len(processed_words)):
+        word = processed_words[read]
+        if word != processed_words[kept - 1]:
+            processed_words[kept] = word
+            kept += 1
+    del processed_words[kept:]
+    final_words = processed_words
     
     # Capitalize first word
     if final_words:
@@ -118,10 +199,11 @@ def isl_to_english_sentence(recognized_signs: list) -> str:
     sentence = " ".join(final_words)
     
     # Determine punctuation
-    has_question_word = any(word in final_words for word in question_words)
+    # The capitalized first word is checked by prefix, which also catches
+    # words like 'however'; the rest by one set test
     is_question_pattern = (
-        has_question_word or 
-        sentence.lower().startswith(('how', 'what', 'why', 'when', 'where', 'who', 'which'))
+        not QUESTION_WORDS.isdisjoint(final_words) or
+        final_words[0].lower().startswith(QUESTION_PREFIXES)
     )
     
     if is_question_pattern:
@@ -129,28 +211,121 @@ def isl_to_english_sentence(recognized_signs: list) -> str:
     else:
         sentence = sentence + '.'
     
-    # Final cleanup of common issues
-    sentence = sentence.replace(' ?', '?').replace(' .', '.')
-    sentence = sentence.replace('am are', 'am')  # Fix double verbs
-    sentence = sentence.replace('is are', 'is')
-    sentence = sentence.replace('  ', ' ')  # Remove double spaces
-    
-    return sentence
+    # Final cleanup of common issues, in one pass over the sentence
+    return FIXUP_RE.sub(_fixup, sentence)
 
 # Additional utility functions
+CONFIDENCE_WINDOW = 5
+
 def smooth_predictions(predictions, window_size=3):
     """Apply smoothing to prediction sequence"""
     if len(predictions) < window_size:
         return predictions[-1] if predictions else None
     
+    # Default window: the mode of three is a couple of comparisons; with no
+    # repeat the most recent prediction wins
+    if window_size == 3:
+        a, b, c = predictions[-3], predictions[-2], predictions[-1]
+        return a if a == b or a == c else (b if b == c else c)
+    
     # Return the most common prediction in the window
     recent = predictions[-window_size:]
     return max(set(recent), key=recent.count)
 
+def smooth_predictions_deque(window):
+    """
+    smooth_predictions for a collections.deque(maxlen=window_size) that the
+    caller appends each prediction to: the deque is the window, so nothing is
+    sliced or copied and memory stays bounded.
+    """
+    if len(window) < window.maxlen:
+        return window[-1] if window else None
+    
+    if window.maxlen == 3:
+        a, b, c = window
+        return a if a == b or a == c else (b if b == c else c)
+    
+    return max(set(window), key=window.count)
+
+def smooth_prediction_ids(pred_ids, window_size=3):
+    """
+    smooth_predictions for int-encoded labels (e.g. indices into label_classes),
+    counted in one bincount; ties go to the smallest id. Returns -1 when empty.
+    """
+    if len(pred_ids) < window_size:
+        return int(pred_ids[-1]) if len(pred_ids) else -1
+    
+    # Default window: a few comparisons; with no repeat the smallest id wins
+    if window_size == 3:
+        a, b, c = int(pred_ids[-3]), int(pred_ids[-2]), int(pred_ids[-1])
+        if a == b or a == c:
+            return a
+        if b == c:
+            return b
+        return a if a < b and a < c else (b if b < c else c)
+    
+    recent = np.asarray(pred_ids[-window_size:], dtype=np.intp)
+    return int(np.bincount(recent).argmax())
+
+def smooth_prediction_bytes(buf, window_size=3):
+    """
+    smooth_prediction_ids for a window of label ids stored one per byte
+    (bytes, bytearray or array.array('B')), counted with the C-level count().
+    Ties go to the smallest id. Returns -1 when empty.
+    """
+    if len(buf) < window_size:
+        return buf[-1] if buf else -1
+    
+    # Default window: a few comparisons; with no repeat the smallest id wins
+    if window_size == 3:
+        a, b, c = buf[-3], buf[-2], buf[-1]
+        if a == b or a == c:
+            return a
+        if b == c:
+            return b
+        return a if a < b and a < c else (b if b < c else c)
+    
+    recent = buf[-window_size:]
+    return max(sorted(set(recent)), key=recent.count)
+
 def calculate_confidence_metrics(confidence_scores):
     """Calculate confidence metrics for predictions"""
     if not confidence_scores:
         return 0.0
     
-    recent_scores = confidence_scores[-5:]  # Last 5 predictions
-    return sum(recent_scores) / len(recent_scores)
\ No newline at end of file
+    recent_scores = confidence_scores[-CONFIDENCE_WINDOW:]  # Last 5 predictions
+    return sum(recent_scores) / len(recent_scores)
+
+class ConfidenceBuffer:
+    """
+    Rolling mean of the last CONFIDENCE_WINDOW confidence scores, kept as a ring
+    buffer with a running sum so each push is O(1). `mean` matches
+    calculate_confidence_metrics over the same scores.
+    """
+    def __init__(self, window_size=CONFIDENCE_WINDOW):
+        self.buf = np.zeros(window_size, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+        self.running_sum = 0.0
+
+    def push(self, score):
+        window_size = len(self.buf)
+        if self.count == window_size:
+            self.running_sum -= self.buf[self.head]
+        else:
+            self.count += 1
+        self.buf[self.head] = score
+        self.running_sum += score
+        self.head = (self.head + 1) % window_size
+        if self.head == 0:
+            # Resync once per lap so floating-point error cannot accumulate
+            self.running_sum = float(self.buf.sum())
+
+    @property
+    def mean(self):
+        return self.running_sum / self.count if self.count else 0.0
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.running_sum = 0.0
\ No newline at end of file